@@ -0,0 +1,255 @@
+"""
+Response caches for LLM generations
+
+ExactCache returns a stored response when model, system, prompt and
+temperature all match, backed by an in-process LRU and a SQLite file.
+
+SemanticCache stores responses per (model, system, max_tokens) together with the
+embedding of the prompt that produced them. A lookup returns a stored response
+when a new prompt is similar enough (cosine similarity above a threshold) and
+mentions the same names and numbers, so "capital of France" never answers
+"capital of Spain".
+"""
+import asyncio
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Awaitable, Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+# Words that may name an entity: capitalized words and anything with a digit
+_TERM_PATTERN = re.compile(r"[A-Za-z0-9][\w'-]*")
+_SENTENCE_END = re.compile(r"[.!?]\s*$")
+
+
+def cache_key(
+    model: str,
+    system: Optional[str],
+    prompt: str,
+    temperature: float,
+    max_tokens: Optional[int] = None
+) -> str:
+    """SHA-256 key of all generation inputs"""
+    payload = json.dumps(
+        {
+            "model": model,
+            "system": system,
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ExactCache:
+    """Exact-match response cache with an in-memory LRU over a SQLite store"""
+    
+    def __init__(self, path: str, memory_size: int = 1024):
+        """
+        Args:
+            path: SQLite database file
+            memory_size: Number of responses kept in the in-memory LRU
+        """
+        self.path = Path(path)
+        self.memory_size = memory_size
+        self.memory: "OrderedDict[str, str]" = OrderedDict()
+        self.connection: Optional[sqlite3.Connection] = None
+        self.lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at INTEGER NOT NULL)"
+            )
+            self.connection.commit()
+        return self.connection
+    
+    def _select(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT response FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def _insert(self, key: str, response: str):
+        connection = self._connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+            (key, response, int(time.time()))
+        )
+        connection.commit()
+    
+    def _remember(self, key: str, response: str):
+        self.memory[key] = response
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+    
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss"""
+        response = self.memory.get(key)
+        if response is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return response
+        
+        async with self.lock:
+            response = await asyncio.to_thread(self._select, key)
+        if response is None:
+            self.misses += 1
+            return None
+        
+        self._remember(key, response)
+        self.hits += 1
+        return response
+    
+    async def put(self, key: str, response: str):
+        """Store a response for a key"""
+        self._remember(key, response)
+        async with self.lock:
+            await asyncio.to_thread(self._insert, key, response)
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss statistics"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self.memory)
+        }
+    
+    def close(self):
+        """Close the SQLite connection"""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def normalize(vector: List[float]) -> List[float]:
+    """Scale a vector to unit length"""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return vector
+    return [x / norm for x in vector]
+
+
+def key_terms(prompt: str) -> FrozenSet[str]:
+    """
+    Names and numbers in a prompt
+    
+    Capitalized words (other than the first word of a sentence) and words
+    containing digits, lowercased and without possessive 's.
+    """
+    terms = set()
+    previous_end = None
+    for match in _TERM_PATTERN.finditer(prompt):
+        word = match.group()
+        sentence_start = previous_end is None or bool(_SENTENCE_END.search(prompt[previous_end:match.start()]))
+        if any(c.isdigit() for c in word) or (word[0].isupper() and not sentence_start):
+            terms.add(re.sub(r"'s$", "", word.lower()))
+        previous_end = match.end()
+    return frozenset(terms)
+
+
+def best_match(
+    embedding: List[float],
+    entries: List[Tuple[List[float], str]]
+) -> Tuple[float, Optional[str]]:
+    """Most similar stored response for a unit-length embedding"""
+    best_score, best_response = 0.0, None
+    for stored, response in entries:
+        score = sum(x * y for x, y in zip(embedding, stored))
+        if score > best_score:
+            best_score, best_response = score, response
+    return best_score, best_response
+
+
+class SemanticCache:
+    """In-memory cache of responses keyed on prompt embeddings"""
+    
+    def __init__(
+        self,
+        embed: Callable[[str], Awaitable[List[float]]],
+        threshold: float = 0.97,
+        max_entries: int = 512
+    ):
+        """
+        Args:
+            embed: Coroutine function returning the embedding of a text
+            threshold: Minimum cosine similarity for a cache hit
+            max_entries: Maximum entries kept per (model, system, max_tokens, key terms)
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.entries: Dict[Tuple, Deque[Tuple[List[float], str]]] = {}
+        self.pending: Dict[str, List[float]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    async def _embedding(self, prompt: str) -> List[float]:
+        """Embed a prompt, reusing the embedding computed by a preceding get()"""
+        embedding = self.pending.pop(prompt, None)
+        if embedding is None:
+            embedding = normalize(await self.embed(prompt))
+        return embedding
+    
+    async def get(
+        self,
+        model: str,
+        system: Optional[str],
+        prompt: str,
+        max_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """Return a cached response for a similar prompt, or None on a miss"""
+        embedding = await self._embedding(prompt)
+        entries = list(self.entries.get((model, system or "", max_tokens, key_terms(prompt)), ()))
+        # The similarity scan is CPU-bound, keep it off the event loop
+        best_score, best_response = await asyncio.to_thread(best_match, embedding, entries)
+        
+        if best_response is not None and best_score >= self.threshold:
+            self.hits += 1
+            return best_response
+        
+        self.misses += 1
+        if len(self.pending) >= self.max_entries:
+            self.pending.clear()
+        self.pending[prompt] = embedding
+        return None
+    
+    async def put(
+        self,
+        model: str,
+        system: Optional[str],
+        prompt: str,
+        response: str,
+        max_tokens: Optional[int] = None
+    ):
+        """Store a response for a prompt"""
+        embedding = await self._embedding(prompt)
+        bucket = self.entries.setdefault(
+            (model, system or "", max_tokens, key_terms(prompt)),
+            deque(maxlen=self.max_entries)
+        )
+        bucket.append((embedding, response))
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss statistics"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": sum(len(bucket) for bucket in self.entries.values())
+        }
@@ -2,7 +2,8 @@
 Configuration for the LLM Council
 """
 import os
-from typing import List
+from dataclasses import dataclass
+from typing import Tuple
 
 # Ollama Configuration
 OLLAMA_BASE_URLS = {
@@ -12,28 +13,97 @@ OLLAMA_BASE_URLS = {
     "chairman": os.getenv("OLLAMA_CHAIRMAN_URL", "http://localhost:11434"),
 }
 
+@dataclass(frozen=True, slots=True)
+class ModelSpec:
+    """An Ollama model, the URL of the server hosting it and its context size"""
+    name: str
+    url: str
+    num_ctx: int
+
+
+# Context window per model, sent on every request (including warmup) so Ollama
+# never reloads a model. Members only see one question (Stage 1) or the review
+# prompt (Stage 2); the chairman also reads every review (Stage 3). A model used
+# both as member and chairman should get the same value in both settings.
+COUNCIL_NUM_CTX = int(os.getenv("COUNCIL_NUM_CTX", "4096"))
+CHAIRMAN_NUM_CTX = int(os.getenv("CHAIRMAN_NUM_CTX", "8192"))
+
+
 # Models for each council member
-# These should be pulled from Ollama beforehand
-# Example: ollama pull llama3.2, ollama pull gemma3:1b, ollama pull qwen3:1.7b
-COUNCIL_MODELS = [
-    {"name": "llama3.2", "url": OLLAMA_BASE_URLS["council_1"]},
-    {"name": "gemma3:1b", "url": OLLAMA_BASE_URLS["council_2"]},
-    {"name": "qwen3:1.7b", "url": OLLAMA_BASE_URLS["council_3"]},
-]
+# These should be pulled from Ollama beforehand. Explicit 4-bit quantization
+# tags keep memory traffic (and so decode latency) low:
+#   ollama pull llama3.2:3b-instruct-q4_K_M
+#   ollama pull gemma3:1b-it-q4_K_M
+#   ollama pull qwen3:1.7b-q4_K_M
+COUNCIL_MODELS: Tuple[ModelSpec, ...] = (
+    ModelSpec("llama3.2:3b-instruct-q4_K_M", OLLAMA_BASE_URLS["council_1"], COUNCIL_NUM_CTX),
+    ModelSpec("gemma3:1b-it-q4_K_M", OLLAMA_BASE_URLS["council_2"], COUNCIL_NUM_CTX),
+    ModelSpec("qwen3:1.7b-q4_K_M", OLLAMA_BASE_URLS["council_3"], COUNCIL_NUM_CTX),
+)
 
 # Chairman model - synthesizes final response
-# Example: ollama pull qwen3:4b
-CHAIRMAN_MODEL = {
-    "name": os.getenv("CHAIRMAN_MODEL", "qwen3:4b"),
-    "url": OLLAMA_BASE_URLS["chairman"]
-}
+# Example: ollama pull qwen3:4b-q4_K_M
+CHAIRMAN_MODEL = ModelSpec(
+    os.getenv("CHAIRMAN_MODEL", "qwen3:4b-q4_K_M"),
+    OLLAMA_BASE_URLS["chairman"],
+    CHAIRMAN_NUM_CTX
+)
+
+# Sampling temperature per stage
+# Reviews and synthesis default to 0 so they are deterministic and can be
+# served by the response caches; opinions keep some diversity
+OPINION_TEMPERATURE = float(os.getenv("COUNCIL_OPINION_TEMPERATURE", "0.5"))
+REVIEW_TEMPERATURE = float(os.getenv("COUNCIL_REVIEW_TEMPERATURE", "0"))
+CHAIRMAN_TEMPERATURE = float(os.getenv("COUNCIL_CHAIRMAN_TEMPERATURE", "0"))
+
+# Generation limits
+NUM_PREDICT = int(os.getenv("OLLAMA_NUM_PREDICT", "1024"))
+# Capped calls are sent with thinking disabled, so the caps only cover the answer
+REVIEW_MAX_TOKENS = int(os.getenv("COUNCIL_REVIEW_MAX_TOKENS", "256"))
+CHAIRMAN_MAX_TOKENS = int(os.getenv("COUNCIL_CHAIRMAN_MAX_TOKENS", "768"))
+
+# Skip the chairman when every reviewer ranks the same response first
+# and their scores for it differ by at most FASTPATH_MAX_SPREAD points
+FASTPATH_ENABLED = os.getenv("COUNCIL_FASTPATH", "0") == "1"
+FASTPATH_MAX_SPREAD = float(os.getenv("COUNCIL_FASTPATH_SPREAD", "1"))
+
+# Stage 1 responses are cut to this many characters in review prompts
+TRUNCATE_CHARS = int(os.getenv("COUNCIL_TRUNC", "4000"))
 
 # API Configuration
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
 
+# Maximum concurrent requests sent to one Ollama URL
+# Defaults to the council size, matching OLLAMA_NUM_PARALLEL=3 in
+# docker-compose.yaml; lower it if the server runs fewer parallel slots
+MAX_INFLIGHT_PER_URL = int(
+    os.getenv("COUNCIL_MAX_INFLIGHT_PER_URL", os.getenv("OLLAMA_NUM_PARALLEL", "3"))
+)
+
+# How long Ollama keeps a model loaded after a request
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "10m")
+
+# Health check cache (in seconds)
+HEALTH_REFRESH_INTERVAL = float(os.getenv("HEALTH_REFRESH_INTERVAL", "5"))
+HEALTH_MAX_AGE = float(os.getenv("HEALTH_MAX_AGE", "30"))
+
 # Timeout settings (in seconds)
-TIMEOUTREQUEST_ = 900
+REQUEST_TIMEOUT = 900
+
+# Exact-match prompt cache (deterministic generations only)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite")
+LLM_CACHE_MEMORY_SIZE = 1024
+
+# Semantic response cache for Stage 1 opinions, off by default
+# Only used when COUNCIL_OPINION_TEMPERATURE=0, and requires an embedding
+# model in Ollama: ollama pull nomic-embed-text
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+EMBEDDING_URL = os.getenv("EMBEDDING_URL", OLLAMA_BASE_URLS["chairman"])
 
 # Storage
 CONVERSATIONS_DIR = "data/conversations"
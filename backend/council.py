@@ -9,84 +9,237 @@ The LLM Council is a multi-stage reasoning system:
 This approach emphasizes diversity of reasoning, self‑critique, and aggregation of perspectives.
 """
 import asyncio
+import hashlib
 import random
-from typing import List, Dict, Tuple
-from backend.ollama_client import OllamaClient
-from backend.config import COUNCIL_MODELS, CHAIRMAN_MODEL
+import re
+from typing import Awaitable, Callable, Final, List, Dict, Optional, Set, Tuple
+from backend.ollama_client import OllamaClient, close_all
+from backend.config import (
+    COUNCIL_MODELS,
+    CHAIRMAN_MODEL,
+    REVIEW_MAX_TOKENS,
+    CHAIRMAN_MAX_TOKENS,
+    OPINION_TEMPERATURE,
+    REVIEW_TEMPERATURE,
+    CHAIRMAN_TEMPERATURE,
+    TRUNCATE_CHARS,
+    FASTPATH_ENABLED,
+    FASTPATH_MAX_SPREAD,
+)
+
+
+# Background tasks (chairman warmups), kept referenced until they complete
+_background_tasks: Set[asyncio.Task] = set()
+
+
+# Prompt templates - static text is rendered once so every call shares a
+# byte-identical prefix (see LLMCouncil docstring for the ordering convention)
+OPINION_SYSTEM: Final[str] = (
+    "You are a helpful and knowledgeable AI assistant."
+    "Provide a thoughtful and accurate response to the user's query."
+    "Veracity, accuracy and insight are the top priority. Try to be concise. Consistency is important."
+)
+
+REVIEW_SYSTEM: Final[str] = (
+    "You are a critical evaluator in a council. Review and rank ONLY the responses provided. "
+    "Do not invent or reference responses that are not explicitly shown. "
+    "Try to be concise and objective in your evaluations."
+)
+
+REVIEW_HEADER: Final[str] = """You are ranking anonymized responses from council members.
+Rank ONLY the responses shown below, using ONLY the response IDs listed for this question.
+Do NOT create rankings for any other response IDs.
+Provide your ranking and brief justification based on accuracy and insight. Try to be concise.
+Consistency is important.
+
+Please rank these responses from best to worst. For each response, provide:
+1. The response ID
+2. Your score (1-10)
+3. Brief justification
+
+Format your answer as:
+Response [ID]: [Score]/10 - [Justification]
+
+--- DYNAMIC ---
+"""
+
+REVIEW_QUERY_TMPL: Final[str] = """Original question: {query}
+
+Here are ALL {n} responses from council members (anonymized):
+
+"""
+
+REVIEW_FOOTER_TMPL: Final[str] = """
+
+IMPORTANT: You must rank ONLY these {n} responses with IDs: {ids}
+"""
+
+CHAIRMAN_SYSTEM: Final[str] = (
+    "You are the Chairman of a council. Your role is to synthesize "
+    "multiple peer-reviewed answers written by 3 models into a single comprehensive and accurate final answer. "
+    "Consider all viewpoints and the reviews provided. Do not add new exclusive information."
+)
+
+CHAIRMAN_HEADER: Final[str] = """As Chairman, please synthesize the council member responses, ranking and reviews below into a single
+comprehensive final answer. You should only synthesize responses and not generate your own opinions.
+
+--- DYNAMIC ---
+"""
+
+CHAIRMAN_FOOTER_TMPL: Final[str] = """Original question: {query}
+
+Council member responses:
+{responses}
+
+Peer reviews:
+{reviews}
+"""
+
+
+def dedupe_responses(responses: List[str]) -> List[Tuple[int, str]]:
+    """
+    Collapse identical Stage 1 responses before review
+    
+    Args:
+        responses: Stage 1 responses in member order
+        
+    Returns:
+        (response_id, response) tuples for unique responses, where the ID is
+        the 1-based position of the first member that gave that response
+    """
+    unique: Dict[bytes, Tuple[int, str]] = {}
+    for response_id, resp in enumerate(responses, 1):
+        digest = hashlib.blake2b(resp.strip().encode(), digest_size=16).digest()
+        unique.setdefault(digest, (response_id, resp))
+    return list(unique.values())
+
+
+def build_review_prompt(
+    user_query: str,
+    responses: List[Tuple[int, str]]  # [(anonymous_id, response), ...]
+) -> str:
+    """
+    Build the Stage 2 review prompt shared by all reviewers
+    
+    Args:
+        user_query: Original user question
+        responses: List of (anonymous_id, response) tuples
+        
+    Returns:
+        Review prompt
+    """
+    responses_text = "\n\n".join([
+        f"BEGINNING OF RESPONSE {id}:\n{resp}\nEND OF RESPONSE {id}."
+        for id, resp in responses
+    ])
+    ids_list = ", ".join([str(id) for id, _ in responses])
+    
+    return "".join([
+        REVIEW_HEADER,
+        REVIEW_QUERY_TMPL.format(query=user_query, n=len(responses)),
+        responses_text,
+        REVIEW_FOOTER_TMPL.format(n=len(responses), ids=ids_list)
+    ])
+
+
+# Matches "Response [ID]: [Score]/10" lines, with or without brackets or bold
+REVIEW_SCORE_PATTERN: Final = re.compile(r"Response\s+\[?(\d+)\]?[*\s]*:[*\s]*\[?(\d+(?:\.\d+)?)\]?\s*/\s*10")
+
+
+def parse_top_choice(review: str, valid_ids: set) -> Optional[Tuple[int, float]]:
+    """
+    Extract the best-scored response from a review
+    
+    Args:
+        review: Review text in the "Response [ID]: [Score]/10" format,
+            optionally preceded by a <think>...</think> reasoning block
+        valid_ids: Response IDs that were shown to the reviewer
+        
+    Returns:
+        (response_id, score) of the top-scored response, or None if the
+        review does not score every shown response or has a tie for first place
+    """
+    # Draft scores inside a reasoning block are not the final ranking
+    review = review.rsplit("</think>", 1)[-1]
+    
+    scores = {}
+    for response_id, score in REVIEW_SCORE_PATTERN.findall(review):
+        if int(response_id) in valid_ids:
+            scores.setdefault(int(response_id), float(score))
+    # Partial or truncated reviews are not a confident choice
+    if not scores or set(scores) != valid_ids:
+        return None
+    
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+        return None
+    return ranked[0]
+
+
+def unanimous_winner(reviews: List[Dict], valid_ids: set) -> Optional[int]:
+    """
+    Return the response ID every reviewer ranked first with similar scores
+    
+    Args:
+        reviews: Stage 2 reviews
+        valid_ids: Response IDs that were reviewed
+        
+    Returns:
+        Winning response ID, or None if the council is not unanimous
+    """
+    choices = [parse_top_choice(r["review"], valid_ids) for r in reviews]
+    if not choices or None in choices:
+        return None
+    if len({response_id for response_id, _ in choices}) != 1:
+        return None
+    
+    scores = [score for _, score in choices]
+    if max(scores) - min(scores) > FASTPATH_MAX_SPREAD:
+        return None
+    return choices[0][0]
 
 
 class CouncilMember:
     """Represents a single LLM in the council"""
     
-    def __init__(self, model_name: str, base_url: str):
+    def __init__(self, model_name: str, base_url: str, num_ctx: Optional[int] = None):
         self.model_name = model_name
         self.base_url = base_url
-        self.client = OllamaClient(base_url, model_name)
+        self.client = OllamaClient(base_url, model_name, num_ctx)
         self.response = None
         self.rankings = []
     
-    async def generate_opinion(self, user_query: str) -> str:
-        """Stage 1: Generate initial response to user query"""
-        system = (
-            "You are a helpful and knowledgeable AI assistant."
-            "Provide a thoughtful and accurate response to the user's query."
-            "Veracity, accuracy and insight are the top priority. Try to be concise. Consistency is important."
+    async def generate_opinion(
+        self,
+        user_query: str,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> str:
+        """Stage 1: Generate initial response to user query, streaming chunks to on_token"""
+        self.response = await self.client.generate(
+            user_query,
+            system=OPINION_SYSTEM,
+            temperature=OPINION_TEMPERATURE,
+            on_token=on_token,
+            semantic=True
         )
-        self.response = await self.client.generate(user_query, system=system)
         return self.response
     
-    async def review_responses(
-        self,
-        user_query: str,
-        responses: List[Tuple[str, str]]  # [(anonymous_id, response), ...]
-    ) -> List[Dict]:
+    async def review_responses(self, prompt: str) -> Dict:
         """
         Stage 2: Review and rank other responses
         
         Args:
-            user_query: Original user question
-            responses: List of (anonymous_id, response) tuples
+            prompt: Review prompt built once per query by build_review_prompt
             
         Returns:
             Rankings with explanations
         """
-        # Prepare the review prompt
-        responses_text = "\n\n".join([
-            f"BEGINNING OF RESPONSE {id}:\n{resp}\nEND OF RESPONSE {id}."
-            for id, resp in responses
-        ])
-        
-        # Get the list of response IDs
-        response_ids = [str(id) for id, _ in responses]
-        ids_list = ", ".join(response_ids)
-        
-        system = (
-            "You are a critical evaluator in a council. Review and rank ONLY the responses provided. "
-            "Do not invent or reference responses that are not explicitly shown. "
-            "Try to be concise and objective in your evaluations."
+        review = await self.client.generate(
+            prompt,
+            system=REVIEW_SYSTEM,
+            temperature=REVIEW_TEMPERATURE,
+            max_tokens=REVIEW_MAX_TOKENS
         )
-        
-        prompt = f"""Original question: {user_query}
-
-Here are ALL {len(responses)} responses from council members (anonymized):
-
-{responses_text}
-
-IMPORTANT: You must rank ONLY these {len(responses)} responses with IDs: {ids_list}
-Do NOT create rankings for any other response IDs.
-Provide your ranking and brief justification based on accuracy and insight. Try to be concise.
-Consistency is important.
-
-Please rank these responses from best to worst. For each response, provide:
-1. The response ID (must be one of: {ids_list})
-2. Your score (1-10)
-3. Brief justification
-
-Format your answer as:
-Response [ID]: [Score]/10 - [Justification]
-"""
-        
-        review = await self.client.generate(prompt, system=system)
         self.rankings.append(review)
         return {"model": self.model_name, "review": review}
     
@@ -98,16 +251,17 @@ Response [ID]: [Score]/10 - [Justification]
 class Chairman:
     """The Chairman LLM that synthesizes the final response"""
     
-    def __init__(self, model_name: str, base_url: str):
+    def __init__(self, model_name: str, base_url: str, num_ctx: Optional[int] = None):
         self.model_name = model_name
         self.base_url = base_url
-        self.client = OllamaClient(base_url, model_name)
+        self.client = OllamaClient(base_url, model_name, num_ctx)
     
     async def synthesize_final_answer(
         self,
         user_query: str,
         council_responses: List[Dict[str, str]],  # [{"model": name, "response": text}, ...]
-        reviews: List[Dict[str, str]]  # [{"model": name, "review": text}, ...]
+        reviews: List[Dict[str, str]],  # [{"model": name, "review": text}, ...]
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> str:
         """
         Stage 3: Create final synthesized response
@@ -116,6 +270,7 @@ class Chairman:
             user_query: Original user question
             council_responses: All council member responses
             reviews: All reviews from stage 2
+            on_token: Optional callback receiving each streamed chunk of the answer
             
         Returns:
             Final synthesized answer
@@ -131,24 +286,19 @@ class Chairman:
             for r in reviews
         ])
         
-        system = (
-            "You are the Chairman of a council. Your role is to synthesize "
-            "multiple peer-reviewed answers written by 3 models into a single comprehensive and accurate final answer. "
-            "Consider all viewpoints and the reviews provided. Do not add new exclusive information."
+        prompt = CHAIRMAN_HEADER + CHAIRMAN_FOOTER_TMPL.format(
+            query=user_query,
+            responses=responses_text,
+            reviews=reviews_text
         )
         
-        prompt = f"""Original question: {user_query}
-
-Council member responses:
-{responses_text}
-
-Peer reviews:
-{reviews_text}
-
-As Chairman, please synthesize these responses, ranking and reviews into a single 
-comprehensive final answer. You should only synthesize responses and not generate your own opinions."""
-        
-        final_answer = await self.client.generate(prompt, system=system)
+        final_answer = await self.client.generate(
+            prompt,
+            system=CHAIRMAN_SYSTEM,
+            temperature=CHAIRMAN_TEMPERATURE,
+            on_token=on_token,
+            max_tokens=CHAIRMAN_MAX_TOKENS
+        )
         return final_answer
     
     async def close(self):
@@ -157,22 +307,30 @@ comprehensive final answer. You should only synthesize responses and not generat
 
 
 class LLMCouncil:
-    """Main orchestrator for the LLM Council workflow"""
+    """
+    Main orchestrator for the LLM Council workflow
+    
+    Prompt ordering convention: every Stage 2 and Stage 3 prompt starts with
+    its static instructions and format spec, followed by a "--- DYNAMIC ---"
+    marker and only then the query, responses and reviews. Keeping the static
+    part as an identical prefix lets Ollama reuse its KV cache across calls.
+    """
     
     def __init__(self):
         self.members = [
-            CouncilMember(model["name"], model["url"])
+            CouncilMember(model.name, model.url, model.num_ctx)
             for model in COUNCIL_MODELS
         ]
-        self.chairman = Chairman(CHAIRMAN_MODEL["name"], CHAIRMAN_MODEL["url"])
+        self.chairman = Chairman(CHAIRMAN_MODEL.name, CHAIRMAN_MODEL.url, CHAIRMAN_MODEL.num_ctx)
     
-    async def process_query(self, user_query: str, progress_callback=None) -> Dict:
+    async def process_query(self, user_query: str, progress_callback=None, token_callback=None) -> Dict:
         """
         Execute the full 3-stage council workflow
         
         Args:
             user_query: The user's question
             progress_callback: Optional callback for progress updates
+            token_callback: Optional callback (stage, model, text) for streamed chunks
             
         Returns:
             Dict containing all stages of the response
@@ -184,21 +342,28 @@ class LLMCouncil:
             "stage3_final": ""
         }
         
-        # Stage 1: First Opinions - Process sequentially to avoid resource overload
+        # Stage 1: First Opinions - Query all members concurrently
         if progress_callback:
             await progress_callback("stage1", "Gathering initial responses...")
         
-        responses = []
-        for i, member in enumerate(self.members, 1):
+        async def gather_opinion(member: CouncilMember) -> str:
+            on_token = None
+            if token_callback:
+                async def on_token(text: str):
+                    await token_callback("stage1", member.model_name, text)
+            response = await member.generate_opinion(user_query, on_token)
             if progress_callback:
-                await progress_callback("stage1", f"Getting response from {member.model_name} ({i}/{len(self.members)})...")
-            try:
-                response = await member.generate_opinion(user_query)
-                responses.append(response)
-            except Exception as e:
+                await progress_callback("stage1", f"Received response from {member.model_name}")
+            return response
+        
+        opinion_tasks = [gather_opinion(member) for member in self.members]
+        responses = await asyncio.gather(*opinion_tasks, return_exceptions=True)
+        
+        for member, response in zip(self.members, responses):
+            if isinstance(response, BaseException):
                 if progress_callback:
-                    await progress_callback("error", f"Error from {member.model_name}: {str(e)}")
-                raise
+                    await progress_callback("error", f"Error from {member.model_name}: {str(response)}")
+                raise response
         
         for member, response in zip(self.members, responses):
             result["stage1_responses"].append({
@@ -206,29 +371,56 @@ class LLMCouncil:
                 "response": response
             })
         
+        # Load the chairman model while Stage 2 runs to hide its cold start
+        warmup_task = asyncio.create_task(self.chairman.client.warmup())
+        _background_tasks.add(warmup_task)
+        warmup_task.add_done_callback(_background_tasks.discard)
+        warmup_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        
         # Stage 2: Review & Ranking
         if progress_callback:
             await progress_callback("stage2", "Council members reviewing responses...")
         
-        # Anonymize responses for unbiased review
-        anonymous_responses = list(enumerate(responses, 1))
-        random.shuffle(anonymous_responses)
-        
-        review_tasks = [
-            member.review_responses(user_query, anonymous_responses)
-            for member in self.members
+        # Anonymize unique responses for unbiased review, truncating long ones
+        anonymous_responses = [
+            (response_id, resp if len(resp) <= TRUNCATE_CHARS else resp[:TRUNCATE_CHARS] + "…")
+            for response_id, resp in dedupe_responses(responses)
         ]
-        reviews = await asyncio.gather(*review_tasks)
-        result["stage2_reviews"] = reviews
+        # Seeded from the responses so identical Stage 1 output yields an
+        # identical review prompt that the exact-match cache can serve
+        seed = hashlib.blake2b("\0".join(responses).encode(), digest_size=8).digest()
+        random.Random(seed).shuffle(anonymous_responses)
+        review_prompt = build_review_prompt(user_query, anonymous_responses)
+        
+        # Reviews run concurrently; members sharing one Ollama are overlapped
+        # by its OLLAMA_NUM_PARALLEL scheduler
+        review_tasks = [member.review_responses(review_prompt) for member in self.members]
+        result["stage2_reviews"] = await asyncio.gather(*review_tasks)
+        
+        # Fast path: a unanimous council makes the chairman redundant
+        if FASTPATH_ENABLED:
+            winner = unanimous_winner(result["stage2_reviews"], {response_id for response_id, _ in anonymous_responses})
+            if winner is not None:
+                warmup_task.cancel()
+                if progress_callback:
+                    await progress_callback("stage3", "Council is unanimous, skipping chairman synthesis...")
+                result["stage3_final"] = result["stage1_responses"][winner - 1]["response"]
+                return result
         
         # Stage 3: Chairman Final Answer
         if progress_callback:
             await progress_callback("stage3", "Chairman synthesizing final answer...")
         
+        on_token = None
+        if token_callback:
+            async def on_token(text: str):
+                await token_callback("stage3", self.chairman.model_name, text)
+        
         final_answer = await self.chairman.synthesize_final_answer(
             user_query,
             result["stage1_responses"],
-            result["stage2_reviews"]
+            result["stage2_reviews"],
+            on_token
         )
         result["stage3_final"] = final_answer
         
@@ -236,14 +428,15 @@ class LLMCouncil:
     
     async def health_check(self) -> Dict[str, bool]:
         """Check health of all council members and chairman"""
-        checks = {}
-        for member in self.members:
-            checks[f"council_{member.model_name}"] = await member.client.health_check()
-        checks[f"chairman_{self.chairman.model_name}"] = await self.chairman.client.health_check()
-        return checks
+        names = [f"council_{member.model_name}" for member in self.members]
+        names.append(f"chairman_{self.chairman.model_name}")
+        clients = [member.client for member in self.members] + [self.chairman.client]
+        results = await asyncio.gather(*[client.health_check() for client in clients])
+        return dict(zip(names, results))
     
     async def close(self):
         """Clean up all resources"""
         for member in self.members:
             await member.close()
         await self.chairman.close()
+        await close_all()
@@ -2,17 +2,24 @@
 FastAPI backend for LLM Council
 """
 import asyncio
-import json
 import os
-from datetime import datetime
+import secrets
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Final, Optional, Set
+import orjson
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 from backend.council import LLMCouncil
-from backend.config import CONVERSATIONS_DIR, API_HOST, API_PORT
+from backend.config import (
+    CONVERSATIONS_DIR,
+    API_HOST,
+    API_PORT,
+    HEALTH_REFRESH_INTERVAL,
+    HEALTH_MAX_AGE,
+)
 
 
 # Initialize FastAPI app
@@ -27,9 +34,80 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Conversations storage directory, resolved once
+CONVERSATIONS_PATH: Final[Path] = Path(CONVERSATIONS_DIR)
+
 # Global council instance
 council: Optional[LLMCouncil] = None
 
+# Pending background writes, kept referenced until they complete
+_persist_tasks: Set[asyncio.Task] = set()
+
+
+def _write_json(path: Path, data: dict):
+    """Write a conversation to disk"""
+    path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+def _read_json(path: Path) -> dict:
+    """Read a conversation from disk"""
+    return orjson.loads(path.read_bytes())
+
+
+def new_conversation_id() -> str:
+    """Sortable conversation ID: timestamp plus a random suffix to avoid collisions"""
+    return f"{time.strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(3)}"
+
+
+async def send_json(websocket: WebSocket, payload: dict):
+    """Send a JSON text frame serialized with orjson"""
+    await websocket.send_text(orjson.dumps(payload).decode())
+
+
+def _scan_conversations() -> Dict[str, dict]:
+    """Build the conversations index from the files on disk"""
+    return {
+        file.stem: {"id": file.stem, "timestamp": file.stem}
+        for file in CONVERSATIONS_PATH.glob("*.json")
+    }
+
+
+async def _persist(conversation_id: str, result: dict):
+    """Save a conversation without blocking the event loop"""
+    conversation_path = CONVERSATIONS_PATH / f"{conversation_id}.json"
+    try:
+        await asyncio.to_thread(_write_json, conversation_path, result)
+    except OSError as e:
+        print(f"Failed to save conversation {conversation_id}: {e}")
+        return
+    
+    async with app.state.conversations_lock:
+        app.state.conversations_index[conversation_id] = {
+            "id": conversation_id,
+            "timestamp": conversation_id
+        }
+        app.state.conversations_sorted = None
+
+
+def save_conversation(conversation_id: str, result: dict):
+    """Schedule a conversation to be saved in the background"""
+    task = asyncio.create_task(_persist(conversation_id, result))
+    _persist_tasks.add(task)
+    task.add_done_callback(_persist_tasks.discard)
+
+
+async def _health_refresher(council: LLMCouncil, state):
+    """Refresh the cached health status in the background"""
+    while True:
+        try:
+            state.health_cache = {
+                "ts": time.monotonic(),
+                "data": await council.health_check()
+            }
+        except Exception as e:
+            print(f"Health check failed: {e}")
+        await asyncio.sleep(HEALTH_REFRESH_INTERVAL)
+
 
 class QueryRequest(BaseModel):
     """Request model for queries"""
@@ -47,15 +125,28 @@ async def startup_event():
     """Initialize the council on startup"""
     global council
     council = LLMCouncil()
+    app.state.council = council
     
     # Ensure conversations directory exists
-    Path(CONVERSATIONS_DIR).mkdir(parents=True, exist_ok=True)
+    CONVERSATIONS_PATH.mkdir(parents=True, exist_ok=True)
+    
+    # Index saved conversations once; new saves are added by _persist
+    app.state.conversations_lock = asyncio.Lock()
+    app.state.conversations_index = await asyncio.to_thread(_scan_conversations)
+    app.state.conversations_sorted = None
+    
+    # Probe Ollama periodically; /health serves the latest result
+    app.state.health_cache = {"ts": 0, "data": {}}
+    app.state.health_task = asyncio.create_task(_health_refresher(council, app.state))
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown"""
     global council
+    app.state.health_task.cancel()
+    if _persist_tasks:
+        await asyncio.gather(*_persist_tasks)
     if council:
         await council.close()
 
@@ -76,7 +167,11 @@ async def health_check():
     if not council:
         raise HTTPException(status_code=503, detail="Council not initialized")
     
-    health_status = await council.health_check()
+    health_cache = app.state.health_cache
+    if time.monotonic() - health_cache["ts"] > HEALTH_MAX_AGE:
+        raise HTTPException(status_code=503, detail="Health status unavailable")
+    
+    health_status = health_cache["data"]
     all_healthy = all(health_status.values())
     
     return {
@@ -99,11 +194,8 @@ async def process_query(request: QueryRequest):
     result = await council.process_query(request.query)
     
     # Save conversation
-    conversation_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-    conversation_path = Path(CONVERSATIONS_DIR) / f"{conversation_id}.json"
-    
-    with open(conversation_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    conversation_id = new_conversation_id()
+    save_conversation(conversation_id, result)
     
     return QueryResponse(
         conversation_id=conversation_id,
@@ -121,11 +213,11 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             # Receive query from client
-            data = await websocket.receive_json()
+            data = orjson.loads(await websocket.receive_text())
             query = data.get("query", "")
             
             if not query:
-                await websocket.send_json({
+                await send_json(websocket, {
                     "type": "error",
                     "message": "No query provided"
                 })
@@ -133,24 +225,30 @@ async def websocket_endpoint(websocket: WebSocket):
             
             # Progress callback
             async def progress_callback(stage: str, message: str):
-                await websocket.send_json({
+                await send_json(websocket, {
                     "type": "progress",
                     "stage": stage,
                     "message": message
                 })
             
+            # Streamed token callback
+            async def token_callback(stage: str, model: str, text: str):
+                await send_json(websocket, {
+                    "type": "token",
+                    "stage": stage,
+                    "model": model,
+                    "text": text
+                })
+            
             # Process query with progress updates
-            result = await council.process_query(query, progress_callback)
+            result = await council.process_query(query, progress_callback, token_callback)
             
             # Save conversation
-            conversation_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-            conversation_path = Path(CONVERSATIONS_DIR) / f"{conversation_id}.json"
-            
-            with open(conversation_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
+            conversation_id = new_conversation_id()
+            save_conversation(conversation_id, result)
             
             # Send final result
-            await websocket.send_json({
+            await send_json(websocket, {
                 "type": "result",
                 "conversation_id": conversation_id,
                 "data": result
@@ -159,7 +257,7 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         print("Client disconnected")
     except Exception as e:
-        await websocket.send_json({
+        await send_json(websocket, {
             "type": "error",
             "message": str(e)
         })
@@ -168,35 +266,26 @@ async def websocket_endpoint(websocket: WebSocket):
 @app.get("/conversations/{conversation_id}")
 async def get_conversation(conversation_id: str):
     """Retrieve a saved conversation by ID"""
-    conversation_path = Path(CONVERSATIONS_DIR) / f"{conversation_id}.json"
+    conversation_path = CONVERSATIONS_PATH / f"{conversation_id}.json"
     
     if not conversation_path.exists():
         raise HTTPException(status_code=404, detail="Conversation not found")
     
-    with open(conversation_path, 'r', encoding='utf-8') as f:
-        conversation = json.load(f)
-    
-    return conversation
+    return await asyncio.to_thread(_read_json, conversation_path)
 
 
 @app.get("/conversations")
 async def list_conversations():
     """List all saved conversations"""
-    conversations_path = Path(CONVERSATIONS_DIR)
-    
-    if not conversations_path.exists():
-        return {"conversations": []}
-    
-    conversations = []
-    for file in conversations_path.glob("*.json"):
-        conversations.append({
-            "id": file.stem,
-            "timestamp": file.stem
-        })
-    
-    return {"conversations": sorted(conversations, key=lambda x: x["id"], reverse=True)}
+    if app.state.conversations_sorted is None:
+        conversations = app.state.conversations_index.values()
+        app.state.conversations_sorted = sorted(conversations, key=lambda x: x["id"], reverse=True)
+    return {"conversations": app.state.conversations_sorted}
 
 
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
-    uvicorn.run(app, host=API_HOST, port=API_PORT)
+    # uvloop is not available on Windows; fall back to the default loop there
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    uvicorn.run(app, host=API_HOST, port=API_PORT, loop=loop, http="httptools")
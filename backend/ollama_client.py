@@ -1,24 +1,99 @@
 """
 Ollama API client for communicating with local LLM instances
 """
+import asyncio
+import json
 import httpx
-from typing import Dict, List, Optional
-from backend.config import REQUEST_TIMEOUT
+from typing import Awaitable, Callable, Dict, List, Optional
+from backend.cache import ExactCache, SemanticCache, cache_key
+from backend.config import (
+    REQUEST_TIMEOUT,
+    COUNCIL_MODELS,
+    KEEP_ALIVE,
+    NUM_PREDICT,
+    MAX_INFLIGHT_PER_URL,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MEMORY_SIZE,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    EMBEDDING_MODEL,
+    EMBEDDING_URL,
+)
+
+# Shared HTTP clients, one connection pool per Ollama base URL
+_CLIENTS: Dict[str, httpx.AsyncClient] = {}
+
+# Concurrency limits, one semaphore per Ollama base URL
+_SEMAPHORES: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_client(base_url: str) -> httpx.AsyncClient:
+    """Return the shared HTTP client for a base URL, creating it on first use"""
+    base_url = base_url.rstrip('/')
+    client = _CLIENTS.get(base_url)
+    if client is None or client.is_closed:
+        # HTTP/1.1 keep-alive pool sized to the council fan-out
+        limits = httpx.Limits(
+            max_keepalive_connections=max(8, 2 * len(COUNCIL_MODELS)),
+            max_connections=max(16, 4 * len(COUNCIL_MODELS))
+        )
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=REQUEST_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(retries=1, http2=False, limits=limits)
+        )
+        _CLIENTS[base_url] = client
+    return client
+
+
+def _sem_for(base_url: str) -> asyncio.Semaphore:
+    """Return the semaphore bounding in-flight requests to a base URL"""
+    semaphore = _SEMAPHORES.get(base_url)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_INFLIGHT_PER_URL)
+        _SEMAPHORES[base_url] = semaphore
+    return semaphore
+
+
+async def close_all():
+    """Close every shared HTTP client"""
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    for client in clients:
+        await client.aclose()
+    if exact_cache is not None:
+        exact_cache.close()
 
 
 class OllamaClient:
     """Client for interacting with Ollama API endpoints"""
     
-    def __init__(self, base_url: str, model: str):
+    def __init__(self, base_url: str, model: str, num_ctx: Optional[int] = None):
         self.base_url = base_url.rstrip('/')
         self.model = model
-        self.client = httpx.AsyncClient(timeout=REQUEST_TIMEOUT)
+        self.num_ctx = num_ctx
+    
+    def _options(self, **options) -> Dict:
+        """Request options, with this model's fixed context size"""
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+        return options
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, recreated if close_all() has closed it"""
+        return get_client(self.base_url)
     
     async def generate(
         self,
         prompt: str,
         system: Optional[str] = None,
-        temperature: float = 0.5
+        temperature: float = 0.5,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+        max_tokens: Optional[int] = None,
+        semantic: bool = False
     ) -> str:
         """
         Generate a response from the LLM
@@ -27,29 +102,102 @@ class OllamaClient:
             prompt: The user prompt
             system: Optional system message
             temperature: Sampling temperature (0.0 to 1.0)
+            max_tokens: Optional cap on generated tokens (defaults to NUM_PREDICT);
+                capped calls also disable thinking so the cap covers the answer
+            on_token: Optional callback receiving each streamed chunk of text
+            semantic: Allow the semantic cache; only for prompts that are
+                entirely user text, since templated prompts share a long
+                static prefix that makes unrelated prompts look similar
             
         Returns:
             Generated text response
         """
+        # Only deterministic generations are served from the caches
+        key = None
+        if exact_cache is not None and temperature == 0:
+            key = cache_key(self.model, system, prompt, temperature, max_tokens)
+            cached = await exact_cache.get(key)
+            if cached is not None:
+                if on_token:
+                    await on_token(cached)
+                return cached
+        
+        use_cache = semantic and semantic_cache is not None and temperature == 0
+        if use_cache:
+            try:
+                cached = await semantic_cache.get(self.model, system, prompt, max_tokens)
+            except Exception:
+                cached, use_cache = None, False
+            if cached is not None:
+                if on_token:
+                    await on_token(cached)
+                return cached
+        
+        response_text = await self._generate(prompt, system, temperature, on_token, max_tokens)
+        
+        if key is not None:
+            await exact_cache.put(key, response_text)
+        
+        if use_cache:
+            try:
+                await semantic_cache.put(self.model, system, prompt, response_text, max_tokens)
+            except Exception:
+                pass
+        return response_text
+    
+    async def _generate(
+        self,
+        prompt: str,
+        system: Optional[str],
+        temperature: float,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Send a streamed generation request to Ollama and join the chunks"""
         endpoint = f"{self.base_url}/api/generate"
         
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature
-            }
+            "stream": True,
+            "keep_alive": KEEP_ALIVE,
+            "options": self._options(
+                temperature=temperature,
+                num_predict=max_tokens or NUM_PREDICT
+            )
         }
         
         if system:
             payload["system"] = system
         
+        # Reasoning tokens count against num_predict; with a tight cap a
+        # thinking model (qwen3) would stop before writing its answer
+        if max_tokens:
+            payload["think"] = False
+        
+        chunks = []
         try:
-            response = await self.client.post(endpoint, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("response", "")
+            async with _sem_for(self.base_url):
+                async with self.client.stream("POST", endpoint, json=payload) as response:
+                    if response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if "error" in data:
+                            raise Exception(f"Ollama API error for {self.model}: {data['error']}")
+                        token = data.get("response", "")
+                        if token:
+                            chunks.append(token)
+                            if on_token:
+                                await on_token(token)
+                        if data.get("done"):
+                            if data.get("done_reason") == "length":
+                                print(f"Ollama output for {self.model} was cut off at {payload['options']['num_predict']} tokens")
+                            break
+            return "".join(chunks)
         except httpx.TimeoutException as e:
             raise Exception(f"Ollama API timeout for {self.model}: Request took longer than {REQUEST_TIMEOUT}s. The model may need more time to load or generate a response.")
         except httpx.HTTPStatusError as e:
@@ -57,6 +205,48 @@ class OllamaClient:
         except httpx.HTTPError as e:
             raise Exception(f"Ollama API error for {self.model}: {type(e).__name__} - {str(e)}")
     
+    async def warmup(self):
+        """Load the model into memory without generating any tokens"""
+        endpoint = f"{self.base_url}/api/generate"
+        
+        payload = {
+            "model": self.model,
+            "keep_alive": KEEP_ALIVE,
+            # Same context size as _generate, otherwise Ollama reloads the model
+            "options": self._options()
+        }
+        
+        try:
+            response = await self.client.post(endpoint, json=payload)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise Exception(f"Ollama warmup error for {self.model}: {type(e).__name__} - {str(e)}")
+    
+    async def embed(self, text: str) -> List[float]:
+        """
+        Compute the embedding of a text
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding vector
+        """
+        endpoint = f"{self.base_url}/api/embeddings"
+        
+        payload = {
+            "model": self.model,
+            "prompt": text
+        }
+        
+        try:
+            response = await self.client.post(endpoint, json=payload)
+            response.raise_for_status()
+            data = response.json()
+            return data.get("embedding", [])
+        except httpx.HTTPError as e:
+            raise Exception(f"Ollama embeddings API error for {self.model}: {type(e).__name__} - {str(e)}")
+    
     async def chat(
         self,
         messages: List[Dict[str, str]],
@@ -78,13 +268,16 @@ class OllamaClient:
             "model": self.model,
             "messages": messages,
             "stream": False,
-            "options": {
-                "temperature": temperature
-            }
+            "keep_alive": KEEP_ALIVE,
+            "options": self._options(
+                temperature=temperature,
+                num_predict=NUM_PREDICT
+            )
         }
         
         try:
-            response = await self.client.post(endpoint, json=payload)
+            async with _sem_for(self.base_url):
+                response = await self.client.post(endpoint, json=payload)
             response.raise_for_status()
             data = response.json()
             return data.get("message", {}).get("content", "")
@@ -95,6 +288,39 @@ class OllamaClient:
         except httpx.HTTPError as e:
             raise Exception(f"Ollama chat API error for {self.model}: {type(e).__name__} - {str(e)}")
     
+    async def health_check(self) -> bool:
+        """
+        Check that the Ollama server is reachable and serves this model
+        
+        Returns:
+            True if the model is available
+        """
+        endpoint = f"{self.base_url}/api/tags"
+        
+        try:
+            response = await self.client.get(endpoint, timeout=5)
+            response.raise_for_status()
+            models = response.json().get("models", [])
+        except (httpx.HTTPError, ValueError):
+            return False
+        
+        names = {model.get("name", "") for model in models}
+        return self.model in names or f"{self.model}:latest" in names
+    
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """No-op: the shared HTTP client is closed by close_all()"""
+
+
+# Caches shared by all clients
+exact_cache: Optional[ExactCache] = None
+if LLM_CACHE_ENABLED:
+    exact_cache = ExactCache(LLM_CACHE_PATH, memory_size=LLM_CACHE_MEMORY_SIZE)
+
+# Semantic cache embedding prompts through Ollama (opt-in, Stage 1 only)
+semantic_cache: Optional[SemanticCache] = None
+if SEMANTIC_CACHE_ENABLED:
+    semantic_cache = SemanticCache(
+        OllamaClient(EMBEDDING_URL, EMBEDDING_MODEL).embed,
+        threshold=SEMANTIC_CACHE_THRESHOLD,
+        max_entries=SEMANTIC_CACHE_MAX_ENTRIES
+    )
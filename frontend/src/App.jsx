@@ -9,6 +9,7 @@ function App() {
   const [result, setResult] = useState(null)
   const [activeTab, setActiveTab] = useState(0)
   const [healthStatus, setHealthStatus] = useState(null)
+  const [streaming, setStreaming] = useState({})
   const wsRef = useRef(null)
 
 
@@ -25,12 +26,25 @@ function App() {
       
       if (data.type === 'progress') {
         setProgress(data.message)
+      } else if (data.type === 'token') {
+        // Buffer streamed text per stage and model
+        const key = `${data.stage}:${data.model}`
+        setStreaming((prev) => ({
+          ...prev,
+          [key]: {
+            stage: data.stage,
+            model: data.model,
+            text: (prev[key]?.text || '') + data.text
+          }
+        }))
       } else if (data.type === 'result') {
         setResult(data.data)
+        setStreaming({})
         setLoading(false)
         setProgress('')
       } else if (data.type === 'error') {
         alert('Error: ' + data.message)
+        setStreaming({})
         setLoading(false)
         setProgress('')
       }
@@ -55,6 +69,7 @@ function App() {
 
     setLoading(true)
     setResult(null)
+    setStreaming({})
     setActiveTab(0)
     setProgress('Connecting to council...')
 
@@ -96,6 +111,22 @@ function App() {
           </div>
         )}
 
+        {!result && Object.keys(streaming).length > 0 && (
+          <div className="results">
+            <section className="stage stage-streaming">
+              <h2>Live Output</h2>
+              <div className="reviews-grid">
+                {Object.entries(streaming).map(([key, buffer]) => (
+                  <div key={key} className={`response-card ${buffer.stage === 'stage3' ? 'chairman' : ''}`}>
+                    <h3>{buffer.stage === 'stage3' ? `Chairman (${buffer.model})` : buffer.model}</h3>
+                    <ReactMarkdown>{buffer.text}</ReactMarkdown>
+                  </div>
+                ))}
+              </div>
+            </section>
+          </div>
+        )}
+
         {result && (
           <div className="results">
             <section className="stage stage-final">
@@ -0,0 +1,83 @@
+"""
+Tests for the Stage 2 review parsing that decides the chairman fast path
+"""
+from backend.council import REVIEW_SCORE_PATTERN, parse_top_choice, unanimous_winner
+
+
+def reviews(*texts):
+    return [{"model": f"model_{i}", "review": text} for i, text in enumerate(texts)]
+
+
+def test_score_pattern_formats():
+    text = (
+        "Response 2: 9/10 - good\n"
+        "Response [1]: [7]/10 - ok\n"
+        "**Response 3**: 5/10 - weak\n"
+        "**Response 4:** 8.5 / 10 - fine"
+    )
+    assert REVIEW_SCORE_PATTERN.findall(text) == [("2", "9"), ("1", "7"), ("3", "5"), ("4", "8.5")]
+
+
+def test_score_pattern_ignores_other_text():
+    assert REVIEW_SCORE_PATTERN.findall("Response 1 is the best, I give it 9 points") == []
+
+
+def test_top_choice():
+    assert parse_top_choice("Response 1: 6/10\nResponse 2: 9/10", {1, 2}) == (2, 9.0)
+
+
+def test_top_choice_first_score_per_id_wins():
+    assert parse_top_choice("Response 1: 9/10\nResponse 2: 5/10\nResponse 1: 3/10", {1, 2}) == (1, 9.0)
+
+
+def test_top_choice_requires_every_id():
+    assert parse_top_choice("Response 1: 9/10", {1, 2}) is None
+
+
+def test_top_choice_ignores_unknown_ids():
+    assert parse_top_choice("Response 1: 9/10\nResponse 2: 4/10\nResponse 7: 10/10", {1, 2}) == (1, 9.0)
+
+
+def test_top_choice_tie():
+    assert parse_top_choice("Response 1: 8/10\nResponse 2: 8/10", {1, 2}) is None
+
+
+def test_top_choice_skips_reasoning_block():
+    review = (
+        "<think>Draft: Response 1: 2/10, Response 2: 9/10</think>\n"
+        "Response 1: 9/10 - accurate\nResponse 2: 4/10 - vague"
+    )
+    assert parse_top_choice(review, {1, 2}) == (1, 9.0)
+
+
+def test_unanimous_winner():
+    result = reviews(
+        "Response 1: 9/10\nResponse 3: 4/10",
+        "Response 3: 5/10\nResponse 1: 8/10",
+        "Response 1: 9/10\nResponse 3: 6/10",
+    )
+    assert unanimous_winner(result, {1, 3}) == 1
+
+
+def test_unanimous_winner_disagreement():
+    result = reviews(
+        "Response 1: 9/10\nResponse 2: 4/10",
+        "Response 1: 4/10\nResponse 2: 9/10",
+    )
+    assert unanimous_winner(result, {1, 2}) is None
+
+
+def test_unanimous_winner_score_spread():
+    result = reviews(
+        "Response 1: 10/10\nResponse 2: 4/10",
+        "Response 1: 6/10\nResponse 2: 4/10",
+    )
+    assert unanimous_winner(result, {1, 2}) is None
+
+
+def test_unanimous_winner_partial_review():
+    assert unanimous_winner(reviews("Response 1: 9/10") * 3, {1, 2}) is None
+
+
+def test_unanimous_winner_no_reviews():
+    assert unanimous_winner([], {1, 2}) is None